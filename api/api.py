@@ -1,9 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import scan
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
+import ormsgpack
+from elasticsearch.helpers import async_scan, async_bulk
+from es_client import get_client
 from typing import List, Optional
+import ast
+import asyncio
 import os
+import pandas as pd
+from pyarrow import csv as pa_csv
 from dotenv import load_dotenv
 import logging
 import time
@@ -19,7 +27,15 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+class ESJSONResponse(ORJSONResponse):
+    """ORJSONResponse tuned for ES documents (naive datetimes, numpy scalars)."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+app = FastAPI(default_response_class=ESJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -30,85 +46,221 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-def create_elasticsearch_client(max_retries=5, retry_delay=5):
-    """Create Elasticsearch client with retry logic."""
-    es_host = os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')
-    logger.info(f"Attempting to connect to Elasticsearch at {es_host}")
-    
+# Compress large POI/city payloads (repetitive JSON keys compress 70-90%)
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
+es = get_client()
+
+@app.on_event("startup")
+async def wait_for_elasticsearch(max_retries=5, retry_delay=5):
+    """Verify the Elasticsearch connection without blocking the event loop."""
+    app.state.es_connected = False
     for attempt in range(max_retries):
         try:
-            
-            es = Elasticsearch(
-                es_host,
-                request_timeout=30,
-                verify_certs=False,
-                ssl_show_warn=False,
-                headers= {
-                    'Accept': "application/json",
-                    'Content-Type': "application/json"
-                }
-            )
-            if not es.ping():
-                logger.error("Failed to connect to Elasticsearch")
-                raise Exception("Failed to connect to Elasticsearch")
-            return es
+            if await es.ping():
+                logger.info("Connected to Elasticsearch")
+                app.state.es_connected = True
+                return
         except Exception as e:
             logger.error(f"Failed to connect to Elasticsearch: {str(e)}")
-            import requests
-            response = requests.get(es_host)
-            logger.error(f"Elasticsearch response: {response.status_code}")
-            raise
-
-# Initialize Elasticsearch client with retry logic
-try:
-    es = create_elasticsearch_client()
-except Exception as e:
-    logger.error(f"Failed to initialize Elasticsearch client: {str(e)}")
-    raise HTTPException(status_code=500, detail=f"Failed to connect to Elasticsearch: {str(e)}")
-
-@app.get("/cities")
-async def get_cities():
-    """Get list of all available cities with their coordinates."""
+        await asyncio.sleep(retry_delay)
+    logger.error(f"Elasticsearch not reachable after {max_retries} attempts")
+
+@app.on_event("shutdown")
+async def close_elasticsearch():
+    await es.close()
+
+POINTS_CSV = os.getenv('POINTS_CSV', './data/Иннополис.csv')
+POINTS_PARQUET = os.path.splitext(POINTS_CSV)[0] + '.zstd'
+# Columns the response actually serves; city_lat/city_lon repeat the
+# same value on every row and are dropped at read time
+POINTS_COLUMNS = ["Name", "Latitude", "Longitude", "Categories", "Custom", "city", "Cluster"]
+
+# Pre-serialized /points payload, invalidated when the source file changes
+_points_cache = None
+_points_cache_mtime = None
+
+def parse_custom_column(df):
+    """Parse the stringified 'Custom' list column without per-row eval()."""
+    def parse_value(value):
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            # Python list literals (single quotes) are not valid JSON
+            return ast.literal_eval(value)
+    values = df["Custom"].to_numpy()
+    df["Custom"] = [parse_value(v) if isinstance(v, str) else v for v in values]
+    return df
+
+@app.get("/points", response_class=Response)
+async def get_points():
+    """Get the demo POI set collected by the scraper."""
+    global _points_cache, _points_cache_mtime
     try:
-        # Use terms aggregation to get unique cities
-        max_cities=10000
-        body = {
-        "size": 0,
-        "aggs": {
-            "by_city": {
-                "terms": {
-                    "field": "city",
-                    "size": max_cities
-                },
-                "aggs": {
-                    "sample_loc": {
-                        "top_hits": {
-                            "size": 1,
-                            "_source": ["location"]
-                        }
+        source = POINTS_PARQUET if os.path.exists(POINTS_PARQUET) else POINTS_CSV
+        mtime = os.path.getmtime(source)
+        if _points_cache is None or mtime != _points_cache_mtime:
+            if source == POINTS_PARQUET:
+                df = pd.read_parquet(source)
+            else:
+                # Multi-threaded C++ parser with column projection; unused
+                # columns never materialize
+                table = pa_csv.read_csv(
+                    source,
+                    convert_options=pa_csv.ConvertOptions(include_columns=POINTS_COLUMNS)
+                )
+                df = table.to_pandas(types_mapper=pd.ArrowDtype)
+                df = parse_custom_column(df)
+                # Convert once so later loads skip the CSV tokenizer
+                try:
+                    df.to_parquet(POINTS_PARQUET, index=False, compression='zstd')
+                except Exception as e:
+                    logger.warning(f"Could not cache points as parquet: {e}")
+            # to_json writes records straight to JSON in C, skipping the
+            # one-dict-per-row detour of to_dict(orient="records")
+            _points_cache = b'{"points":' + df.to_json(orient="records").encode() + b'}'
+            _points_cache_mtime = mtime
+        return Response(content=_points_cache, media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error fetching points: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Serialized /cities payload, refreshed after CITIES_CACHE_TTL seconds
+CITIES_CACHE_TTL = 60
+_cities_cache = None
+_cities_cache_time = 0.0
+
+# One doc per city, rebuilt in the background so /cities never has to
+# aggregate the whole urban_areas index on the hot path
+CITIES_INDEX = "urban_areas_cities"
+CITIES_REFRESH_INTERVAL = 3600
+
+async def aggregate_cities():
+    """Compute the city list from urban_areas with a terms aggregation."""
+    # Use terms aggregation to get unique cities
+    max_cities=10000
+    body = {
+    "size": 0,
+    "aggs": {
+        "by_city": {
+            "terms": {
+                "field": "city",
+                "size": max_cities,
+                # City cardinality is small: a plain hash map beats
+                # building global ordinals, and breadth_first defers
+                # the top_hits sub-agg to the surviving buckets
+                "execution_hint": "map",
+                "collect_mode": "breadth_first"
+            },
+            "aggs": {
+                "sample_loc": {
+                    "top_hits": {
+                        "size": 1,
+                        "_source": ["location.lat", "location.lon"]
                     }
                 }
             }
+        }
+        }
+    }
+
+    response = await es.search(index="urban_areas", body=body, request_cache=True)
+    buckets = response["aggregations"]["by_city"]["buckets"]
+    cities = []
+    for bucket in buckets:
+        cities.append({
+            "name": bucket['key'],
+            "lat": bucket['sample_loc']['hits']['hits'][0]['_source']['location']['lat'],
+            "lon": bucket['sample_loc']['hits']['hits'][0]['_source']['location']['lon']
+        })
+    logger.info("Found %d cities", len(cities))
+    return cities
+
+async def refresh_cities_index():
+    """Materialize the aggregated city list into the tiny cities index."""
+    cities = await aggregate_cities()
+    if not cities:
+        return
+    if not await es.indices.exists(index=CITIES_INDEX):
+        await es.indices.create(index=CITIES_INDEX, body={
+            "mappings": {
+                "properties": {
+                    "name": {"type": "keyword"},
+                    "location": {"type": "geo_point"}
+                }
+            }
+        })
+    actions = [
+        {
+            "_index": CITIES_INDEX,
+            "_id": city["name"],
+            "_source": {
+                "name": city["name"],
+                "location": {"lat": city["lat"], "lon": city["lon"]}
             }
         }
-        
-        response = es.search(index="urban_areas", body=body)
-        buckets = response["aggregations"]["by_city"]["buckets"]
+        for city in cities
+    ]
+    await async_bulk(es, actions)
+    logger.info(f"Refreshed {CITIES_INDEX} with {len(cities)} cities")
+
+@app.on_event("startup")
+async def schedule_cities_refresh():
+    async def refresh_loop():
+        while True:
+            try:
+                await refresh_cities_index()
+            except Exception as e:
+                logger.error(f"Error refreshing cities index: {e}")
+            await asyncio.sleep(CITIES_REFRESH_INTERVAL)
+    # Keep a strong reference: asyncio only holds tasks weakly, so an
+    # anonymous task can be garbage-collected and silently stop
+    app.state.cities_refresh_task = asyncio.create_task(refresh_loop())
+
+@app.on_event("shutdown")
+async def cancel_cities_refresh():
+    task = getattr(app.state, 'cities_refresh_task', None)
+    if task is not None:
+        task.cancel()
+
+@app.get("/cities", response_class=Response)
+async def get_cities():
+    """Get list of all available cities with their coordinates."""
+    global _cities_cache, _cities_cache_time
+    if _cities_cache is not None and time.time() - _cities_cache_time < CITIES_CACHE_TTL:
+        return Response(content=_cities_cache, media_type="application/json")
+    try:
         cities = []
-        for bucket in buckets:
-            cities.append({
-                "name": bucket['key'],
-                "lat": bucket['sample_loc']['hits']['hits'][0]['_source']['location']['lat'],
-                "lon": bucket['sample_loc']['hits']['hits'][0]['_source']['location']['lon']
+        try:
+            response = await es.search(index=CITIES_INDEX, body={
+                "size": 10000,
+                "query": {"match_all": {}},
+                "sort": ["name"]
             })
-            logger.info(f"Found {len(cities)} cities")
-        return {"cities": cities}
+            cities = [
+                {
+                    "name": hit["_source"]["name"],
+                    "lat": hit["_source"]["location"]["lat"],
+                    "lon": hit["_source"]["location"]["lon"]
+                }
+                for hit in response["hits"]["hits"]
+            ]
+        except Exception as e:
+            logger.warning(f"Cities index not available, falling back to aggregation: {e}")
+        if not cities:
+            cities = await aggregate_cities()
+        _cities_cache = orjson.dumps({"cities": cities})
+        _cities_cache_time = time.time()
+        return Response(content=_cities_cache, media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching cities: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/city/{city_name}/pois")
-async def get_city_pois(city_name: str):
+# Number of parallel scroll slices per city scan; 1 disables slicing
+POI_SCAN_SLICES = int(os.getenv('POI_SCAN_SLICES', '2'))
+
+@app.get("/city/{city_name}/pois", response_class=Response)
+async def get_city_pois(city_name: str, request: Request):
     """Get all POIs for a specific city."""
     try:
         query = {
@@ -121,20 +273,83 @@ async def get_city_pois(city_name: str):
             }
         }
         logger.info(f"Fetching POIs for city {city_name}")
-        docs = scan(
+        scan_kwargs = dict(
             client=es,
             index="urban_areas",
-            query=query,
+            size=5000,
+            preserve_order=False,
+            request_timeout=60,
+            # Stable per-city preference keeps repeat requests on the same
+            # replica so its caches stay warm
+            preference=city_name,
             _source_includes=["name", "location", "categories", "timestamp", "metadata", "custom_tags"]
         )
-        pois = [hit["_source"] for hit in docs]
-        
-        return {"pois": pois}
+
+        # Split the scroll into independent slices ES can walk in parallel
+        if POI_SCAN_SLICES > 1:
+            slice_queries = [
+                {**query, "slice": {"id": i, "max": POI_SCAN_SLICES}}
+                for i in range(POI_SCAN_SLICES)
+            ]
+        else:
+            slice_queries = [query]
+
+        # Compact binary alternative for clients that ask for it
+        if "application/msgpack" in request.headers.get("accept", ""):
+            async def collect_slice(slice_query):
+                return [hit["_source"]
+                        async for hit in async_scan(query=slice_query, **scan_kwargs)]
+            results = await asyncio.gather(*(collect_slice(q) for q in slice_queries))
+            pois = [poi for chunk in results for poi in chunk]
+            return Response(ormsgpack.packb({"pois": pois}),
+                            media_type="application/msgpack")
+
+        async def generate_pois():
+            # Stream hits from all slices as one JSON array; peak memory
+            # stays O(batch) and first bytes leave as soon as any slice
+            # returns its first page
+            yield b'{"pois":['
+            first = True
+            queue = asyncio.Queue(maxsize=10000)
+            done = object()
+
+            async def fetch_slice(slice_query):
+                try:
+                    async for hit in async_scan(query=slice_query, **scan_kwargs):
+                        await queue.put(hit)
+                finally:
+                    await queue.put(done)
+
+            tasks = [asyncio.create_task(fetch_slice(q)) for q in slice_queries]
+            finished = 0
+            try:
+                while finished < len(slice_queries):
+                    hit = await queue.get()
+                    if hit is done:
+                        finished += 1
+                        continue
+                    chunk = orjson.dumps(hit["_source"])
+                    yield chunk if first else b',' + chunk
+                    first = False
+                # A failed slice still enqueues its sentinel; surface
+                # the error and break the body instead of closing the
+                # array over a silently truncated result
+                for task in tasks:
+                    exc = task.exception()
+                    if exc is not None:
+                        logger.error(f"Error streaming POIs for city {city_name}: {exc}")
+                        raise exc
+            finally:
+                for task in tasks:
+                    task.cancel()
+            yield b']}'
+
+        return StreamingResponse(generate_pois(), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching POIs for city {city_name}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/nearby")
+@app.get("/nearby", response_class=Response)
 async def get_nearby_pois(
     lat: float,
     lon: float,
@@ -161,6 +376,8 @@ async def get_nearby_pois(
                 }
             },
             "size": size,
+            "track_total_hits": False,
+            "_source": ["name", "location", "categories", "timestamp", "custom_tags"],
             "sort": [
                 {
                     "_geo_distance": {
@@ -169,47 +386,76 @@ async def get_nearby_pois(
                             "lon": lon
                         },
                         "order": "asc",
-                        "unit": "m"
+                        "unit": "m",
+                        "distance_type": "plane"
                     }
                 }
             ]
         }
         
-        response = es.search(index="urban_areas", body=query)
+        # Repeated polls from the same map view reuse one replica's caches
+        response = await es.search(index="urban_areas", body=query,
+                                   preference=f"{round(lat, 2)},{round(lon, 2)}")
         pois = [hit["_source"] for hit in response["hits"]["hits"]]
-        
-        return {"pois": pois}
+
+        return Response(orjson.dumps({"pois": pois}), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching nearby POIs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint. Reports 503 until the warm-up ping succeeds."""
     try:
         # Check if Elasticsearch is responding
-        if es.ping():
+        if await es.ping():
+            app.state.es_connected = True
             return {"status": "healthy", "elasticsearch": "connected"}
-        else:
-            return {"status": "unhealthy", "elasticsearch": "not connected"}
+        app.state.es_connected = False
+        return ESJSONResponse(
+            {"status": "unhealthy", "elasticsearch": "not connected"},
+            status_code=503
+        )
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return {"status": "unhealthy", "error": str(e)}
+        return ESJSONResponse({"status": "unhealthy", "error": str(e)}, status_code=503)
 
 
-@app.get("/clusters")
+@app.get("/clusters", response_class=Response)
 async def get_clusters(city: str):
     """Get all clusters."""
     try:
-        query = {
-            "query": {
-                "term": {
-                    "city": city
+        # Page with a point-in-time + search_after so cities with more
+        # clusters than one page are not silently truncated
+        page_size = 1000
+        pit = (await es.open_point_in_time(index="urban_clusters", keep_alive="1m"))["id"]
+        clusters = []
+        search_after = None
+        try:
+            while True:
+                body = {
+                    "size": page_size,
+                    "query": {
+                        "term": {
+                            "city": city
+                        }
+                    },
+                    "pit": {"id": pit, "keep_alive": "1m"},
+                    "sort": [{"_shard_doc": "asc"}],
+                    "track_total_hits": False
                 }
-            }
-        }
-        response = es.search(index="urban_clusters", body=query)
-        return {"clusters": response["hits"]["hits"]}
+                if search_after is not None:
+                    body["search_after"] = search_after
+                response = await es.search(body=body)
+                hits = response["hits"]["hits"]
+                clusters.extend(hits)
+                if len(hits) < page_size:
+                    break
+                search_after = hits[-1]["sort"]
+                pit = response.get("pit_id", pit)
+        finally:
+            await es.close_point_in_time(id=pit)
+        return Response(orjson.dumps({"clusters": clusters}), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching clusters: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
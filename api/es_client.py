@@ -0,0 +1,35 @@
+"""Shared Elasticsearch client for the API.
+
+Keeps a single AsyncElasticsearch instance (one warm connection pool)
+that any app module can obtain via get_client().
+"""
+
+from elasticsearch import AsyncElasticsearch
+from functools import lru_cache
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_client() -> AsyncElasticsearch:
+    """Lazily build and memoize the shared async Elasticsearch client."""
+    es_host = os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')
+    logger.info(f"Connecting to Elasticsearch at {es_host}")
+    return AsyncElasticsearch(
+        es_host,
+        request_timeout=30,
+        verify_certs=False,
+        ssl_show_warn=False,
+        # Keep a warm pool of persistent connections and gzip the
+        # Python<->ES traffic; large POI scans benefit the most
+        http_compress=True,
+        connections_per_node=25,
+        retry_on_timeout=True,
+        max_retries=3,
+        headers={
+            'Accept': "application/json",
+            'Content-Type': "application/json"
+        }
+    )
@@ -1,4 +1,19 @@
+import ast
+import asyncio
+import re
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    import orjson
+    def _parse_json(response):
+        # Rust parser over the raw bytes buffer, no intermediate str
+        return orjson.loads(response.content)
+except ImportError:
+    def _parse_json(response):
+        return response.json()
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 import os
@@ -14,12 +29,35 @@ logging.basicConfig(
         logging.StreamHandler()
     ]
 )
+logger = logging.getLogger(__name__)
 
 class DataCollector:
     """Collects data from REST API.
         Do not work with this class directly. We have ElasticSearch db docker"""
+    OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+    # OSM tag types queried from Overpass
+    OSM_TAGS = [
+        'amenity', 'shop', 'tourism', 'building', 'club', 'education',
+        'highway', 'landcover', 'historic', 'landuse', 'leisure', 'man_made',
+        'natural', 'office', 'place', 'public_transport', 'waterway',
+        'attraction', 'playground', 'healthcare'
+    ]
+
     def __init__(self):
-        logging.info("Initializing DataCollector class.")
+        logger.info("Initializing DataCollector class.")
+        # Shared session keeps TCP connections alive across requests and
+        # retries the 429/5xx responses Overpass throws under load
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'visualizing_urban_areas/1.0'})
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.5,
+                              status_forcelist=[429, 502, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         # TODO: yaml file
         self.osm_mapping = {
             # AMENITY MAPPINGS
@@ -186,173 +224,355 @@ class DataCollector:
             }
         }
 
+        # Flat (osm_type, osm_value) -> category table plus per-type
+        # wildcard defaults: the common case is a single hash lookup
+        # instead of two nested dict gets per tag
+        self._flat = {
+            (osm_type, value): category
+            for osm_type, mapping in self.osm_mapping.items()
+            for value, category in mapping.items() if value != '*'
+        }
+        self._wildcard = {
+            osm_type: mapping['*']
+            for osm_type, mapping in self.osm_mapping.items() if '*' in mapping
+        }
+        # Per-tag Overpass query templates, rendered once; only the
+        # radius/lat/lon placeholders are filled per call
+        self._overpass_templates = [
+            f'[out:json];\nnode["{tag}"](around:{{radius}},{{lat}},{{lon}});\nout body;'
+            for tag in self.OSM_TAGS
+        ]
+        # Intern table for category combinations: identical Custom sets are
+        # extremely common across POIs, so reuse one tuple per combination
+        # instead of allocating a fresh set+list per node
+        self._cat_cache = {}
+        # Vectorized lookup tables for _map_elements: one Series of
+        # specific value->category mappings per osm_type
+        self._lookup = {
+            osm_type: pd.Series(
+                {value: category for value, category in mapping.items() if value != '*'},
+                dtype=object)
+            for osm_type, mapping in self.osm_mapping.items()
+        }
+
+    # Leading number in a tag value; real OSM carries units like "30 m"
+    _NUM_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+    @staticmethod
+    def _num(value, default=0.0):
+        """Tolerant numeric tag parse: leading number or default."""
+        match = DataCollector._NUM_RE.match(str(value))
+        return float(match.group()) if match else default
+
+    def _building_tag_rules(self, osm_value, tags):
+        """Height/levels/material checks for building values without a direct mapping.
+
+        height/levels are parsed once per node with the tolerant parser
+        instead of up to three float()/int() calls that raise on "30 m"."""
+        height = self._num(tags.get('height'))
+        levels = self._num(tags.get('levels'))
+        if osm_value == 'office':
+            if height > 50 or levels > 30:
+                return 'Business center'
+        if osm_value == 'hotel':
+            material = tags.get('building:material', '').lower()
+            if levels > 20 or height > 60 or material in ('glass', 'mirrored-glass'):
+                return 'Elite r.e.'
+        if osm_value == 'residential':
+            if levels >= 10 or height >= 30:
+                return 'Upper'
+        if osm_value == 'house' and tags.get('detached', 'no') == 'yes':
+            if tags.get('landuse', '').lower() in ('residential', 'village', 'farmyard'):
+                return 'Cottage settlement'
+        return None
+
     def _get_mapped_category(self, osm_type, osm_value, tags=None):
         """Helper method to get the mapped category based on OSM type and value"""
-        logging.debug(f"Getting mapped category for osm_type: {osm_type}, osm_value: {osm_value}, tags: {tags}")
+        logger.debug("Getting mapped category for osm_type: %s, osm_value: %s", osm_type, osm_value)
+        mapped = self._flat.get((osm_type, osm_value))
+        if mapped is not None:
+            return mapped
         if osm_type not in self.osm_mapping:
-            logging.warning(f"OSM type '{osm_type}' not found in mappings.")
+            logger.warning("OSM type '%s' not found in mappings.", osm_type)
             return None
-
-        mapping = self.osm_mapping[osm_type]
-
-        # Handle wildcard mappings
-        if '*' in mapping and osm_value not in mapping:
-            logging.debug(f"Using wildcard mapping for osm_type: {osm_type}, osm_value: {osm_value}")
-            return mapping['*']
-
-        # Handle specific value mappings
-        if osm_value in mapping:
-            logging.debug(f"Found specific mapping for osm_value: {osm_value}")
-            return mapping[osm_value]
-
-        # For building types that need additional tag checks
-        if osm_type == 'building':
-            if tags:
-                # Check for Business center (office with specific material/height)
-                if osm_value == 'office':
-                    levels = int(tags.get('levels', 0))
-                    material = tags.get('building:material', '').lower()
-                    height = float(tags.get('height', 0))
-                    if height > 50 or levels>30:
-                        return 'Business center' # check
-                
-                # Check for Elite r.e. (hotel or levels >20, specific material/height)
-                if osm_value == 'hotel':
-                    levels = int(tags.get('levels', 0))
-                    material = tags.get('building:material', '').lower()
-                    height = float(tags.get('height', 0))
-                    if (levels > 20 or height > 60) or material in ('glass', 'mirrored-glass'):
-                        return 'Elite r.e.'
-                
-                # Check for Upper class residential (tall residential buildings)
-                if osm_value == 'residential':
-                    levels = int(tags.get('levels', 0))
-                    height = float(tags.get('height', 0))
-                    if levels >= 10 or height >= 30:
-                        return 'Upper'
-                # Check for Middle class residential (medium height residential)
-                    if 4 <= levels < 10 or 15 <= height < 30:
-                        return 'Middle'
-                # Check for Lower class residential (small residential)
-                    if levels < 3 or height < 10:
-                        return 'Lower'
-                
-                # Check for Cottage settlement (detached houses with landuse tags)
-                if osm_value == 'house' and tags.get('detached', 'no') == 'yes':
-                    landuse = tags.get('landuse', '').lower()
-                    if landuse in ('residential', 'village', 'farmyard'):
-                        return 'Cottage settlement'
+        mapped = self._wildcard.get(osm_type)
+        if mapped is not None:
+            return mapped
+        if osm_type == 'building' and tags:
+            return self._building_tag_rules(osm_value, tags)
         return None
 
+    def _numeric_tag(self, frame, column):
+        """Numeric tag column with missing/invalid values as 0, vectorized.
+
+        Values with unit suffixes ("30 m") fall back to a regex extract of
+        the leading number instead of collapsing to 0."""
+        if column not in frame.columns:
+            return pd.Series(0.0, index=frame.index)
+        numeric = pd.to_numeric(frame[column], errors='coerce')
+        unparsed = numeric.isna() & frame[column].notna()
+        if unparsed.any():
+            extracted = frame.loc[unparsed, column].astype(str).str.extract(
+                r'(-?\d+(?:\.\d+)?)', expand=False)
+            numeric[unparsed] = pd.to_numeric(extracted, errors='coerce')
+        return numeric.fillna(0)
+
+    def _apply_building_rules(self, frame, values, mapped):
+        """Vectorized height/levels/material checks for unmapped building values.
+
+        Runs on raw NumPy float32 arrays so each comparison is one C kernel
+        pass with no per-expression index alignment."""
+        unmapped = mapped.isna().to_numpy()
+        if not unmapped.any():
+            return mapped
+        levels = self._numeric_tag(frame, 'tags.levels').to_numpy(dtype=np.float32)
+        height = self._numeric_tag(frame, 'tags.height').to_numpy(dtype=np.float32)
+        if 'tags.building:material' in frame.columns:
+            material = frame['tags.building:material'].str.lower().to_numpy(dtype=object)
+        else:
+            material = np.full(len(frame), None, dtype=object)
+        vals = values.to_numpy(dtype=object)
+
+        mapped = mapped.copy()
+        mapped[unmapped & (vals == 'office')
+               & ((height > 50) | (levels > 30))] = 'Business center'
+        mapped[unmapped & (vals == 'hotel')
+               & ((levels > 20) | (height > 60)
+                  | np.isin(material, ['glass', 'mirrored-glass']))] = 'Elite r.e.'
+        mapped[unmapped & (vals == 'residential')
+               & ((levels >= 10) | (height >= 30))] = 'Upper'
+        if 'tags.detached' in frame.columns and 'tags.landuse' in frame.columns:
+            mapped[unmapped & (vals == 'house')
+                   & (frame['tags.detached'].to_numpy(dtype=object) == 'yes')
+                   & frame['tags.landuse'].str.lower().isin(
+                       ['residential', 'village', 'farmyard']).to_numpy()] = 'Cottage settlement'
+        return mapped
+
+    def _map_elements(self, elements, city=None):
+        """Resolve OSM tags to custom categories for all nodes at once.
+
+        Vectorized replacement for the per-node `_get_mapped_category` loop:
+        nodes are flattened into a DataFrame and each osm_type column is
+        mapped through a lookup Series in one pass.
+        @return: (dataframe, city)"""
+        nodes = [element for element in elements if element['type'] == 'node']
+        if not nodes:
+            return pd.DataFrame(), city
+        frame = pd.json_normalize(nodes)
+        # Keep only the columns the mapping consumes; real OSM nodes carry
+        # dozens of tag keys we would otherwise drag through every pass
+        wanted = {'lat', 'lon', 'tags.name', 'tags.place', 'tags.addr:city',
+                  'tags.levels', 'tags.height', 'tags.building:material',
+                  'tags.detached'}
+        wanted.update(f'tags.{osm_type}' for osm_type in self.osm_mapping)
+        frame = frame[[column for column in frame.columns if column in wanted]]
+
+        if 'tags.name' in frame.columns:
+            names = frame['tags.name'].fillna('Unnamed')
+        else:
+            names = pd.Series('Unnamed', index=frame.index)
+
+        # Search for city name for later caching
+        if city is None:
+            if 'tags.place' in frame.columns and 'tags.name' in frame.columns:
+                # Read from the raw name column: an unnamed place node
+                # must not become the literal 'Unnamed' city
+                named_place = (frame['tags.place'].isin(['city', 'town', 'village', 'hamlet'])
+                               & frame['tags.name'].notna())
+                if named_place.any():
+                    city = frame.loc[named_place, 'tags.name'].iloc[0]
+            if city is None and 'tags.addr:city' in frame.columns:
+                addr_city = frame['tags.addr:city'].dropna()
+                if not addr_city.empty:
+                    city = addr_city.iloc[0]
+
+        category_columns = []
+        poi_type = pd.Series(None, index=frame.index, dtype=object)
+        for osm_type in self.osm_mapping:
+            column = f'tags.{osm_type}'
+            if column not in frame.columns:
+                continue
+            values = frame[column]
+            present = values.notna()
+            mapped = values.map(self._lookup[osm_type]).astype(object)
+            if osm_type in self._wildcard:
+                mapped[present & mapped.isna()] = self._wildcard[osm_type]
+            if osm_type == 'building':
+                mapped = self._apply_building_rules(frame, values, mapped)
+            category_columns.append(mapped)
+            # Last matching tag wins, as in the per-node loop
+            poi_type = poi_type.mask(present, osm_type + ':' + values.astype(str))
+
+        if not category_columns:
+            return pd.DataFrame(), city
+
+        cat_cache = self._cat_cache
+
+        def combine(row):
+            categories = set()
+            for value in row:
+                if isinstance(value, list):
+                    categories.update(value)
+                elif pd.notna(value):
+                    categories.add(value)
+            key = frozenset(categories)
+            interned = cat_cache.get(key)
+            if interned is None:
+                interned = cat_cache.setdefault(key, tuple(sorted(categories)))
+            return interned
+
+        combined = pd.concat(category_columns, axis=1)
+        custom = [combine(row) for row in combined.itertuples(index=False, name=None)]
+
+        # Hand pandas the contiguous coordinate arrays as-is instead of
+        # re-casting through Series; no per-column copy is made
+        result = pd.DataFrame({
+            'Name': names,
+            'Latitude': frame['lat'].to_numpy(dtype=np.float64, copy=False),
+            'Longitude': frame['lon'].to_numpy(dtype=np.float64, copy=False),
+            'Categories': poi_type,  # osm category
+            'Custom': custom
+        }, copy=False)
+        # Keep only nodes that resolved to at least one custom category
+        result = result[result['Custom'].map(len) > 0].reset_index(drop=True)
+        return result, city
+
+    def _build_overpass_queries(self, latitude, longitude, radius):
+        """One small query per tag type; Overpass answers them concurrently.
+
+        Only `out body;` — we process nodes exclusively, so the old
+        `>; out skel qt;` recursion just inflated the payload with
+        referenced way/relation members that were discarded."""
+        return [
+            template.format(radius=radius, lat=latitude, lon=longitude)
+            for template in self._overpass_templates
+        ]
+
+    def _read_city_cache(self, city):
+        """Return the cached DataFrame for a city, or None on cache miss."""
+        try:
+            if not os.path.exists('./data'):
+                os.makedirs('./data')
+            if not os.path.exists('./data/collected'):
+                os.makedirs('./data/collected')
+            df=pd.read_parquet(f'./data/collected/{city}_pois.zstd')
+            print("Found city cached")
+            return df
+        except Exception:
+            pass
+        try:
+            # Migrate caches written as CSV by older runs: CSV stores the
+            # Custom lists as strings, parquet keeps them as real lists
+            df=pd.read_csv(f'./data/collected/{city}_pois.csv')
+            df['Custom']=[ast.literal_eval(v) if isinstance(v, str) else v for v in df['Custom']]
+            df.to_parquet(f'./data/collected/{city}_pois.zstd', index=False, compression='zstd')
+            print("Found city cached as legacy csv. Migrated to parquet")
+            return df
+        except Exception:
+            print(f"City {city} not found in cached. Collecting data from API")
+            return None
+
+    def _tile_cache_path(self, latitude, longitude, radius):
+        """Parquet path for a tile-quantized query key.
+
+        Coordinates are rounded to 3 decimals (~110 m), so repeated or
+        jittered queries over the same spot resolve to the same tile."""
+        if not os.path.exists('./data/tiles'):
+            os.makedirs('./data/tiles')
+        return f'./data/tiles/{round(latitude, 3)}_{round(longitude, 3)}_{radius}.zstd'
+
+    def _merge_elements(self, element_lists):
+        """Merge per-tag element lists with node dedup.
+
+        The same node can match several tag queries; the old union query
+        deduplicated server-side."""
+        elements = []
+        seen = set()
+        for element_list in element_lists:
+            for element in element_list:
+                key = (element.get('type'), element.get('id'))
+                if key not in seen:
+                    seen.add(key)
+                    elements.append(element)
+        return elements
+
     def info_nearby_op(self, latitude, longitude, radius, city=None):
         # TODO: fix order of latitude longitude
         """Use Overpass API to search for POIs within circle
            https://wiki.openstreetmap.org/wiki/Overture_categories
            @params: city - use to read cached city data
            @return: dataframe"""
-        overpass_url = "https://overpass-api.de/api/interpreter"
-
-        overpass_query = f"""
-        [out:json];
-        (
-            node["amenity"](around:{radius},{latitude},{longitude});
-            node["shop"](around:{radius},{latitude},{longitude});
-            node["tourism"](around:{radius},{latitude},{longitude});
-            node["building"](around:{radius},{latitude},{longitude});
-            node["club"](around:{radius},{latitude},{longitude});
-            node["education"](around:{radius},{latitude},{longitude});
-            node["highway"](around:{radius},{latitude},{longitude});
-            node["landcover"](around:{radius},{latitude},{longitude});
-            node["historic"](around:{radius},{latitude},{longitude});
-            node["landuse"](around:{radius},{latitude},{longitude});
-            node["leisure"](around:{radius},{latitude},{longitude});
-            node["man_made"](around:{radius},{latitude},{longitude});
-            node["natural"](around:{radius},{latitude},{longitude});
-            node["office"](around:{radius},{latitude},{longitude});
-            node["place"](around:{radius},{latitude},{longitude});
-            node["public_transport"](around:{radius},{latitude},{longitude});
-            node["waterway"](around:{radius},{latitude},{longitude});
-            node["attraction"](around:{radius},{latitude},{longitude});
-            node["playground"](around:{radius},{latitude},{longitude});
-            node["healthcare"](around:{radius},{latitude},{longitude});
-        );
-        out body;
-        >;
-        out skel qt;
-        """
-        
+        return asyncio.run(self.info_nearby_op_async(latitude, longitude, radius, city))
+
+    async def info_nearby_op_async(self, latitude, longitude, radius, city=None):
+        """Async variant of info_nearby_op.
+
+        All per-tag Overpass queries are multiplexed over one HTTP/2
+        connection and awaited together."""
         if city!=None:
-            try:
-                if not os.path.exists('./data'):
-                    os.makedirs('./data')
-                if not os.path.exists('./data/collected'):
-                    os.makedirs('./data/collected')
-                df=pd.read_parquet(f'./data/collected/{city}_pois.zstd')
-                print("Found city cached")
-                return df
-            except Exception:
-                print(f"City {city} not found in cached. Collecting data from API")
-        info_nearby = []
+            cached = self._read_city_cache(city)
+            if cached is not None:
+                return cached
+
+        # Tile cache: identical (lat, lon, radius) queries skip Overpass entirely
+        tile_path = self._tile_cache_path(latitude, longitude, radius)
+        if os.path.exists(tile_path):
+            print("Found tile cached")
+            return pd.read_parquet(tile_path)
+
+        info_nearby = pd.DataFrame()
+        all_ok = False
         try:
-            response = requests.get(overpass_url, params={'data': overpass_query})
-            if response.status_code == 200:
-                logging.info("Successfully received response from Overpass API.")
-                data = response.json()
-                for element in data['elements']:
-                    if element['type'] == 'node':
-                        tags = element.get('tags', {})
-                        name = tags.get('name', 'Unnamed')
-                        lat = element.get('lat')
-                        lon = element.get('lon')
-                        
-                        # Search for city name for later caching
-                        # Check for place=city, place=town, or place=* tags
-                        if city==None:
-                            place_type = tags.get('place')
-                            if place_type in ['city', 'town', 'village', 'hamlet']:
-                                city = tags.get('name')
-                            # Check for addr:city
-                            if 'addr:city' in tags and not city:
-                                city = tags['addr:city']
-                        
-                        mapped_categories = []
-                        poi_type = None
-
-                        # Check all possible OSM tag types
-                        for osm_type in self.osm_mapping.keys():
-                            if osm_type in tags:
-                                osm_value = tags[osm_type]
-                                mapped = self._get_mapped_category(osm_type, osm_value, tags)
-                                if mapped:
-                                    if isinstance(mapped, list):
-                                        mapped_categories.extend(mapped)
-                                    else:
-                                        mapped_categories.append(mapped)
-                                poi_type = f"{osm_type}:{osm_value}"
-
-                        if mapped_categories:
-                            info_nearby.append({
-                                'Name': name,
-                                'Latitude': float(lat),
-                                'Longitude': float(lon),
-                                'Categories': poi_type, #osm category
-                                'Custom': list(set(mapped_categories))  # Remove duplicates
-                            })
-            else:
-                logging.error(f"Error: Received status code {response.status_code} from Overpass API.")
+            # Overpass usage policy: hold concurrency to a handful of
+            # requests, and back off on rate-limit/gateway errors
+            # instead of dropping the tag
+            semaphore = asyncio.Semaphore(4)
+
+            async def fetch(client, query):
+                async with semaphore:
+                    for attempt in range(3):
+                        response = await client.get(self.OVERPASS_URL,
+                                                    params={'data': query})
+                        if response.status_code not in (429, 502, 504):
+                            break
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                    return response
+
+            async with httpx.AsyncClient(http2=True, timeout=60) as client:
+                responses = await asyncio.gather(*(
+                    fetch(client, query)
+                    for query in self._build_overpass_queries(latitude, longitude, radius)
+                ))
+            element_lists = []
+            all_ok = True
+            for response in responses:
+                if response.status_code == 200:
+                    element_lists.append(_parse_json(response).get('elements', []))
+                else:
+                    all_ok = False
+                    logger.error("Error: Received status code %s from Overpass API.", response.status_code)
+            logger.info("Successfully received responses from Overpass API.")
+            info_nearby, city = self._map_elements(self._merge_elements(element_lists), city)
         except Exception as e:
+            all_ok = False
             print(f"Error during Overpass query: {e}")
 
-        if city!=None:
+        # Only cache complete results: a partial frame written here
+        # would permanently hide the failed categories from later runs
+        if not info_nearby.empty and all_ok:
+            info_nearby.to_parquet(tile_path, index=False, compression='zstd')
+        if not all_ok:
+            print("Some Overpass queries failed. Not caching; next time API will be called")
+        elif city!=None:
             print("City found in POI descriptions or passed by you. Saving city data for later usage")
-            pd.DataFrame(info_nearby).to_parquet(f'./data/collected/{city}_pois.zstd', index=False, compression='zstd')
+            info_nearby.to_parquet(f'./data/collected/{city}_pois.zstd', index=False, compression='zstd')
         else:
             print("City not found. Next time API will be called")
-        return pd.DataFrame(info_nearby)
+        return info_nearby
     
     def info_nearby_ors(self, latitude, longitude, step_lat, step_long):
         """Use OpenRouteService to search for POI within rectangle."""
-        logging.info(f"Querying OpenRouteService for POIs in rectangle starting at ({latitude}, {longitude}).")
+        logger.info("Querying OpenRouteService for POIs in rectangle starting at (%s, %s).", latitude, longitude)
         left_top_point = [latitude, longitude][::-1]  # Longitude, Latitude
         right_bottom_point = [left_top_point[0] + step_long, left_top_point[1] + step_lat]
 
@@ -367,7 +587,7 @@ class DataCollector:
         try:
             key = os.environ['ors_sercret']
         except KeyError:
-            logging.error("ORS secret key not found in environment variables.")
+            logger.error("ORS secret key not found in environment variables.")
             return []
 
         headers = {
@@ -377,9 +597,9 @@ class DataCollector:
         }
 
         try:
-            response = requests.post('https://api.openrouteservice.org/pois', json=body, headers=headers)
-            logging.info(f"OpenRouteService response: {response.status_code} {response.reason}")
-            response_data = response.json()
+            response = self.session.post('https://api.openrouteservice.org/pois', json=body, headers=headers)
+            logger.info("OpenRouteService response: %s %s", response.status_code, response.reason)
+            response_data = _parse_json(response)
 
             info_nearby = []
             for item in response_data.get('features', []):
@@ -396,7 +616,7 @@ class DataCollector:
 
             return info_nearby
         except Exception as e:
-            logging.exception(f"Error during OpenRouteService query: {e}")
+            logger.exception("Error during OpenRouteService query: %s", e)
             return []
         
 
@@ -1,9 +1,11 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # Airbnb csv file contains 1GB of airbnbs across the Europe and USA mainly.
 # Initial data have value type mismatches, duplicates, commas within strings (invalid csv)
 file_path = "./data/raw/airbnb_24.csv"
-df = pd.read_csv(file_path)
+output_path = 'data/processed/airbnb_global.zstd'
 
 # from csv obtained, keep only useful for clustering columns
 useful_columns = [
@@ -12,32 +14,83 @@ useful_columns = [
     'Bed Type', 'Square Feet', 'Price', 'Number of Reviews', 'Review Scores Rating',
     'Review Scores Cleanliness', 'Review Scores Location', 'Latitude', 'Longitude'
 ]
-useful_df = df[useful_columns]
-
-# cast to correct types
-useful_df['ID']=pd.to_numeric(useful_df['ID'], downcast='integer', errors='coerce') # cast with .0 
-useful_df=useful_df[useful_df['ID'].notna()] #keep only valid ids
-useful_df['ID']=useful_df['ID'].astype(int) # remove .0
-useful_df=useful_df.drop_duplicates(subset=['ID']) #remove duplicates
-
-useful_df['Longitude']=pd.to_numeric(useful_df['Longitude'], downcast='float', errors='coerce')
-useful_df['Accommodates']=pd.to_numeric(useful_df['Accommodates'], downcast='float', errors='coerce')
-useful_df['Zipcode'] = useful_df['Zipcode'].astype(str)
-
-# Remove separator, \n char from values
-separator=','
-string_columns=useful_df.columns[useful_df.dtypes == 'object'].tolist()
-print('names',string_columns)
-for column_name in string_columns:
-    useful_df[column_name]=useful_df[column_name].str.replace(separator,' ')
-    useful_df[column_name]=useful_df[column_name].str.replace('\n',' ')
-
-# in initial data columns latitude and longitude are mixed up
-# useful_df.rename({'Latitude':'Longitude','Longitude':'Latitude'})
-
-#TODO: Missing values via knn?
-
-print(useful_df.dtypes)
-print('len useful df:',len(useful_df))
-# Change separator since commas appear in text columns
-useful_df.to_parquet('data/processed/airbnb_global.zstd', index=False, compression='zstd')
\ No newline at end of file
+
+# Process the csv in chunks so peak memory stays O(chunk), not O(file)
+chunk_size = 200_000
+
+def clean_chunk(useful_df, seen_ids):
+    """Apply the type fixes and string cleaning to one CSV chunk."""
+    # cast to correct types
+    # coerce ID once, then drop invalid ids, in-chunk duplicates and ids
+    # already written from earlier chunks with a single mask
+    ids = pd.to_numeric(useful_df['ID'], errors='coerce') # cast with .0
+    mask = ids.notna() & ~ids.duplicated() & ~ids.isin(seen_ids)
+    useful_df = useful_df.loc[mask].copy()
+    useful_df['ID'] = ids[mask].astype('int64') # remove .0
+    seen_ids.update(useful_df['ID'].tolist())
+
+    useful_df['Longitude']=pd.to_numeric(useful_df['Longitude'], downcast='float', errors='coerce')
+    useful_df['Accommodates']=pd.to_numeric(useful_df['Accommodates'], downcast='float', errors='coerce')
+    useful_df['Zipcode'] = useful_df['Zipcode'].astype(str)
+
+    # downcast the remaining numeric columns to float32/Int32: halves the
+    # bytes every later pass over the frame has to move
+    float_columns = ['Latitude', 'Bathrooms', 'Bedrooms', 'Beds', 'Square Feet',
+                     'Review Scores Rating', 'Review Scores Cleanliness',
+                     'Review Scores Location']
+    for column_name in float_columns:
+        useful_df[column_name] = pd.to_numeric(useful_df[column_name], errors='coerce').astype('float32')
+    useful_df['Number of Reviews'] = pd.to_numeric(useful_df['Number of Reviews'], errors='coerce').astype('Int32')
+    # Price comes as "$1,234.00"
+    useful_df['Price'] = pd.to_numeric(
+        useful_df['Price'].astype(str).str.replace(r'[$,]', '', regex=True),
+        errors='coerce').astype('float32')
+    # low-cardinality labels: dictionary-encode instead of object strings
+    for column_name in ['Property Type', 'Room Type', 'Bed Type', 'Country', 'State']:
+        useful_df[column_name] = useful_df[column_name].astype('category')
+
+    # Remove separator, \n char from values
+    # Arrow-backed strings run the replacement in Arrow's native kernels, and a
+    # single regex pass handles both characters instead of two object-array scans.
+    # Only the free-text columns go through Arrow dtype: a whole-frame
+    # convert_dtypes would re-infer the numeric columns per chunk and
+    # undo the explicit float32/Int32 casts above
+    string_columns = ['Name', 'Neighborhood Overview', 'Transit', 'Neighbourhood',
+                      'City', 'Summary', 'Zipcode']
+    for column_name in string_columns:
+        useful_df[column_name] = useful_df[column_name].astype(
+            'string[pyarrow]').str.replace(r'[,\n]', ' ', regex=True)
+
+    # in initial data columns latitude and longitude are mixed up
+    # useful_df.rename({'Latitude':'Longitude','Longitude':'Latitude'})
+
+    #TODO: Missing values via knn?
+    return useful_df
+
+writer = None
+schema = None
+seen_ids = set()
+total_rows = 0
+for chunk in pd.read_csv(file_path, usecols=useful_columns, chunksize=chunk_size):
+    useful_df = clean_chunk(chunk, seen_ids)
+    table = pa.Table.from_pandas(useful_df, preserve_index=False)
+    if writer is None:
+        print(useful_df.dtypes)
+        schema = table.schema
+        # Widen dictionary indices to int32 up front: the first chunk's
+        # cardinality would otherwise fix e.g. int8 indices, and a later
+        # chunk with more distinct labels could not be cast to them
+        for i, field in enumerate(schema):
+            if pa.types.is_dictionary(field.type):
+                schema = schema.set(i, field.with_type(
+                    pa.dictionary(pa.int32(), field.type.value_type)))
+        # Change separator since commas appear in text columns
+        writer = pq.ParquetWriter(output_path, schema, compression='zstd')
+    # keep row-group schemas identical across chunks
+    table = table.cast(schema)
+    writer.write_table(table)
+    total_rows += len(useful_df)
+
+if writer is not None:
+    writer.close()
+print('len useful df:', total_rows)
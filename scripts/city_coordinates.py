@@ -1,27 +1,70 @@
 from geopy.geocoders import Nominatim
+from geopy.extra.rate_limiter import RateLimiter
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+from functools import lru_cache
+import os
+import sqlite3
 
+GEOCACHE_PATH = './data/geocache.sqlite'
+
+# Reuse one client so the underlying HTTP session stays warm, and respect
+# Nominatim's 1 req/s policy only when we actually hit the network
+_geolocator = Nominatim(user_agent="city_coordinates_app")
+_geocode = RateLimiter(_geolocator.geocode, min_delay_seconds=1)
+
+def _open_geocache():
+    """Open (and if needed create) the on-disk geocode cache."""
+    os.makedirs(os.path.dirname(GEOCACHE_PATH), exist_ok=True)
+    connection = sqlite3.connect(GEOCACHE_PATH)
+    connection.execute(
+        'CREATE TABLE IF NOT EXISTS geocache '
+        '(query TEXT PRIMARY KEY, latitude REAL, longitude REAL)'
+    )
+    return connection
+
+@lru_cache(maxsize=4096)
 def get_city_coordinates(city_name, county_name=None):
     """
     Get the latitude and longitude coordinates for a city.
-    
+
+    Results are cached in-process (lru_cache) and on disk (sqlite), so only
+    the first lookup for a query ever pays the Nominatim round-trip.
+
     Args:
         city_name (str): Name of the city
         county_name (str, optional): Name of the county. Defaults to None.
-    
+
     Returns:
         tuple: (latitude, longitude) if successful, (None, None) if failed
     """
-    geolocator = Nominatim(user_agent="city_coordinates_app")
-    
     # Construct the query
     query = f"{city_name}"
     if county_name:
         query += f", {county_name}"
-    
+
+    connection = None
+    try:
+        connection = _open_geocache()
+        row = connection.execute(
+            'SELECT latitude, longitude FROM geocache WHERE query = ?', (query,)
+        ).fetchone()
+        if row:
+            connection.close()
+            return row
+    except sqlite3.Error as e:
+        print(f"Geocache unavailable: {e}")
+        connection = None
+
     try:
-        location = geolocator.geocode(query)
+        location = _geocode(query)
         if location:
+            if connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO geocache VALUES (?, ?, ?)',
+                    (query, location.latitude, location.longitude)
+                )
+                connection.commit()
+                connection.close()
             return location.latitude, location.longitude
         return None, None
     except (GeocoderTimedOut, GeocoderUnavailable) as e:
@@ -32,9 +75,9 @@ def main():
     # Example usage
     city = input("Enter city name: ")
     county = input("Enter county name (optional, press Enter to skip): ")
-    
+
     lat, lon = get_city_coordinates(city, county if county else None)
-    
+
     if lat and lon:
         print(f"\nCoordinates for {city}{f', {county}' if county else ''}:")
         print(f"Latitude: {lat}")
@@ -43,4 +86,4 @@ def main():
         print(f"\nCould not find coordinates for {city}{f', {county}' if county else ''}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
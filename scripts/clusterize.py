@@ -7,46 +7,127 @@ for visualization and analysis.
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+try:
+    # Swap in Intel's DAAL-backed kernels for the supported estimators
+    # (KMeans among them) before sklearn is imported; unsupported ones
+    # fall through to stock sklearn, and so does everything when the
+    # package is not installed
+    from sklearnex import patch_sklearn
+    patch_sklearn()
+except ImportError:
+    pass
 from sklearn.preprocessing import StandardScaler
 import yaml
 from math import radians, cos, sin, asin, sqrt
 from sklearn.cluster import KMeans, OPTICS, SpectralClustering, AffinityPropagation, HDBSCAN
 from sklearn.mixture import GaussianMixture
 from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
+from sklearn.metrics.pairwise import haversine_distances
+from sklearn.neighbors import BallTree
 from alphashape import alphashape
+from scipy.spatial import ConvexHull, Delaunay
+from collections import defaultdict
+from joblib import Parallel, delayed
 import pyarrow as pa
 import pyarrow.parquet as pq
 from typing import Dict, List, Tuple, Any, Union
 import numpy.typing as npt
+import hashlib
 import os
 import contextily as ctx
 import geopandas as gpd
 from shapely.geometry import Point, Polygon
 import folium
-from folium.plugins import MarkerCluster
+from folium.plugins import FastMarkerCluster
 import matplotlib.colors as mcolors
+from matplotlib.patches import Patch
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from YAML file."""
     with open('./configs/clustering.yaml') as f:
         return yaml.safe_load(f)
 
-def haversine_distance(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+try:
+    from numba import njit, prange
+
+    @njit(cache=True, fastmath=True)
+    def _haversine_km(lon1, lat1, lon2, lat2):
+        """Scalar haversine in kilometers, inputs in degrees."""
+        lon1, lat1, lon2, lat2 = (radians(lon1), radians(lat1),
+                                  radians(lon2), radians(lat2))
+        a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+        return 6371 * 2 * asin(sqrt(a))
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _haversine_pairwise_km(a, b):
+        """Pairwise haversine in kilometers over (lat, lon) radian rows."""
+        out = np.empty((a.shape[0], b.shape[0]))
+        for i in prange(a.shape[0]):
+            lat1 = a[i, 0]
+            lon1 = a[i, 1]
+            for j in range(b.shape[0]):
+                h = sin((b[j, 0] - lat1) / 2)**2 + \
+                    cos(lat1) * cos(b[j, 0]) * sin((b[j, 1] - lon1) / 2)**2
+                out[i, j] = 6371 * 2 * asin(sqrt(h))
+        return out
+
+    # Pay the JIT compilation cost once at import, not inside the
+    # clustering loops
+    _haversine_km(0.0, 0.0, 0.0, 0.0)
+    _haversine_pairwise_km(np.zeros((1, 2)), np.zeros((1, 2)))
+except ImportError:
+    _haversine_km = None
+    _haversine_pairwise_km = None
+
+def haversine_distance(lon1: Union[float, npt.NDArray[np.float64]],
+                       lat1: Union[float, npt.NDArray[np.float64]],
+                       lon2: Union[float, npt.NDArray[np.float64]],
+                       lat2: Union[float, npt.NDArray[np.float64]]) -> Union[float, npt.NDArray[np.float64]]:
     """
     Calculate the great circle distance between two points on the earth.
-    
+
+    Scalar inputs take a math-module fast path; NumPy arrays are computed
+    element-wise in one vectorized pass.
+
     Args:
         lon1, lat1: Longitude and latitude of first point
         lon2, lat2: Longitude and latitude of second point
-        
+
     Returns:
         Distance in kilometers
     """
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    return 6371 * 2 * asin(sqrt(a))
+    if isinstance(lon1, (int, float)) and isinstance(lon2, (int, float)):
+        if _haversine_km is not None:
+            return _haversine_km(lon1, lat1, lon2, lat2)
+        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+        dlon = lon2 - lon1
+        dlat = lat2 - lat1
+        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+        return 6371 * 2 * asin(sqrt(a))
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(v, dtype=np.float64))
+                              for v in (lon1, lat1, lon2, lat2))
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    return 6371 * 2 * np.arcsin(np.sqrt(a))
+
+def haversine_pairwise(points_a: npt.NDArray[np.float64],
+                       points_b: Union[npt.NDArray[np.float64], None] = None) -> npt.NDArray[np.float64]:
+    """
+    Pairwise great circle distance matrix between two sets of (lat, lon) points.
+
+    Args:
+        points_a: Array of (latitude, longitude) rows
+        points_b: Optional second array; defaults to points_a
+
+    Returns:
+        Distance matrix in kilometers
+    """
+    a = np.radians(np.asarray(points_a, dtype=np.float64))
+    b = a if points_b is None else np.radians(np.asarray(points_b, dtype=np.float64))
+    if _haversine_pairwise_km is not None:
+        return _haversine_pairwise_km(np.ascontiguousarray(a), np.ascontiguousarray(b))
+    return haversine_distances(a, b) * 6371
 
 def calculate_area_metrics(lat_min: float, lat_max: float, long_min: float, long_max: float, 
                          center_lat: float, center_long: float) -> Tuple[float, float, float]:
@@ -61,8 +142,13 @@ def calculate_area_metrics(lat_min: float, lat_max: float, long_min: float, long
     Returns:
         Tuple of (width_km, height_km, area_km2)
     """
-    width_km = haversine_distance(long_min, center_lat, long_max, center_lat)
-    height_km = haversine_distance(center_long, lat_min, center_long, lat_max)
+    # Both calls share a coordinate on one axis, so the haversine
+    # formula collapses: dlat is zero for the width, dlon for the
+    # height. Inline the reduced forms with radians computed once.
+    width_km = 2 * 6371 * asin(sqrt(
+        cos(radians(center_lat))**2 * sin((radians(long_max) - radians(long_min)) / 2)**2))
+    height_km = 2 * 6371 * asin(sqrt(
+        sin((radians(lat_max) - radians(lat_min)) / 2)**2))
     area_km2 = width_km * height_km
     return width_km, height_km, area_km2
 
@@ -85,6 +171,10 @@ def create_clustering_model(method: str, params: Dict[str, Any]) -> Any:
         'gmm': GaussianMixture,
         'affinity': AffinityPropagation
     }
+    # Use every core where the estimator supports it; the config can
+    # still override n_jobs explicitly
+    if method in ('optics', 'hdbscan', 'spectral'):
+        params = {'n_jobs': -1, **params}
     return models[method](**params)
 
 def calculate_cluster_metrics(X: npt.NDArray[np.float64], labels: npt.NDArray[np.int64]) -> Dict[str, float]:
@@ -100,24 +190,153 @@ def calculate_cluster_metrics(X: npt.NDArray[np.float64], labels: npt.NDArray[np
     """
     if len(np.unique(labels)) == 1:
         return {}
-        
-    return {
-        'silhouette': silhouette_score(X, labels),
+
+    metrics = {
         'calinski_harabasz': calinski_harabasz_score(X, labels),
         'davies_bouldin': davies_bouldin_score(X, labels)
     }
 
+    # Silhouette on a precomputed haversine matrix: one geographically
+    # correct distance pass instead of sklearn's euclidean lat/lon
+    # recomputation, subsampled to cap the O(N^2) matrix
+    sample_size = min(5000, len(X))
+    if sample_size < len(X):
+        sample = np.random.default_rng(42).choice(len(X), sample_size, replace=False)
+    else:
+        sample = np.arange(len(X))
+    sample_labels = labels[sample]
+    if len(np.unique(sample_labels)) > 1:
+        distances = haversine_pairwise(X[sample])
+        metrics['silhouette'] = silhouette_score(distances, sample_labels,
+                                                 metric='precomputed')
+    return metrics
+
+def _delaunay_alpha_shape(points: npt.NDArray[np.float64], alpha: float) -> npt.NDArray[np.float64]:
+    """
+    Alpha shape via one scipy Delaunay triangulation and a vectorized
+    circumradius filter, instead of alphashape's per-triangle Python loop.
+
+    Raises ValueError when the boundary is not a single closed ring
+    (caller falls back to the alphashape library).
+    """
+    tri = Delaunay(points)
+    simplices = tri.simplices
+    pt_a = points[simplices[:, 0]]
+    pt_b = points[simplices[:, 1]]
+    pt_c = points[simplices[:, 2]]
+
+    # Side lengths, Heron area and circumradius for all triangles at once
+    a = np.linalg.norm(pt_b - pt_a, axis=1)
+    b = np.linalg.norm(pt_c - pt_b, axis=1)
+    c = np.linalg.norm(pt_a - pt_c, axis=1)
+    s = (a + b + c) / 2
+    area = np.sqrt(np.maximum(s * (s - a) * (s - b) * (s - c), 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        circumradius = (a * b * c) / (4 * area)
+    kept = simplices[(area > 0) & (circumradius < 1.0 / alpha)]
+    if len(kept) == 0:
+        raise ValueError("no triangles pass the alpha filter")
+
+    # Boundary edges are the ones owned by exactly one kept triangle
+    boundary = {}
+    for i0, i1, i2 in kept:
+        for u, v in ((i0, i1), (i1, i2), (i2, i0)):
+            key = (u, v) if u < v else (v, u)
+            if key in boundary:
+                del boundary[key]
+            else:
+                boundary[key] = None
+    adjacency = defaultdict(list)
+    for u, v in boundary:
+        adjacency[u].append(v)
+        adjacency[v].append(u)
+    if any(len(neighbors) != 2 for neighbors in adjacency.values()):
+        raise ValueError("non-manifold alpha-shape boundary")
+
+    # Chain the boundary edges into one closed ring
+    start = next(iter(adjacency))
+    ring = [start]
+    previous, current = None, start
+    while True:
+        neighbors = adjacency[current]
+        nxt = neighbors[0] if neighbors[0] != previous else neighbors[1]
+        if nxt == start:
+            break
+        ring.append(nxt)
+        previous, current = current, nxt
+    if len(ring) != len(adjacency):
+        raise ValueError("alpha-shape boundary has multiple rings")
+    return points[ring + [start]]
+
+# Memo of finished hulls keyed by point-set digest; reruns with tweaked
+# clustering parameters often produce identical clusters, which then
+# skip the triangulation entirely. FIFO-evicted at a small fixed size.
+_HULL_CACHE_SIZE = 256
+_hull_cache: Dict[Tuple[bytes, float], Union[npt.NDArray[np.float64], None]] = {}
+# Second cache level that survives reruns: config iterations (colors,
+# plotting, unrelated categories) reload unchanged hulls from disk
+# instead of re-triangulating them
+_HULL_DISK_CACHE_DIR = './data/processed/cluster_cache'
+
 def create_concave_hull(points: npt.NDArray[np.float64], alpha: float = 0.5) -> Union[npt.NDArray[np.float64], None]:
     """
     Create a concave hull around a set of points.
-    
+
+    Results are memoized on a blake2b hash of the sorted point bytes, so
+    identical clusters across reruns cost one dict lookup.
+
     Args:
         points: Array of points to create hull around
         alpha: Alpha parameter for alphashape (smaller = more concave)
-        
+
     Returns:
         Array of hull coordinates or None if hull creation fails
     """
+    points = np.ascontiguousarray(points, dtype=np.float64)
+    # Order-invariant row sort: lexsort keeps each (lat, lon) pair
+    # intact, unlike a per-column sort which would collide distinct
+    # point sets
+    canonical = np.ascontiguousarray(points[np.lexsort(points.T[::-1])])
+    key = (hashlib.blake2b(canonical.tobytes(), digest_size=16).digest(), alpha)
+    if key in _hull_cache:
+        return _hull_cache[key]
+    cache_path = os.path.join(_HULL_DISK_CACHE_DIR, f'{key[0].hex()}_{alpha}.npy')
+    if os.path.exists(cache_path):
+        hull = np.load(cache_path)
+    else:
+        hull = _create_concave_hull_uncached(points, alpha)
+        if hull is not None:
+            os.makedirs(_HULL_DISK_CACHE_DIR, exist_ok=True)
+            np.save(cache_path, hull)
+    if len(_hull_cache) >= _HULL_CACHE_SIZE:
+        _hull_cache.pop(next(iter(_hull_cache)))
+    _hull_cache[key] = hull
+    return hull
+
+_CONVEX_HULL_THRESHOLD = 8
+
+def _create_concave_hull_uncached(points: npt.NDArray[np.float64], alpha: float) -> Union[npt.NDArray[np.float64], None]:
+    if len(points) < 4:
+        # Triangulation needs 4+ points; neither path can do better
+        # than the points themselves
+        print("Failed to create concave hull - possibly too few points")
+        return None
+    if alpha <= 0 or len(points) <= _CONVEX_HULL_THRESHOLD:
+        # alpha = 0 is the convex hull by definition, and tiny clusters
+        # gain no concavity worth the triangulation; Qhull answers both
+        # in C
+        try:
+            hull = ConvexHull(points)
+            vertices = points[hull.vertices]
+            return np.vstack((vertices, vertices[:1]))
+        except Exception:
+            pass
+    try:
+        return _delaunay_alpha_shape(np.asarray(points, dtype=np.float64), alpha)
+    except Exception:
+        # Degenerate clusters (too few points, split boundaries) go
+        # through the slower but battle-tested alphashape path
+        pass
     try:
         concave_hull = alphashape(points, alpha)
         return np.array(concave_hull.exterior.coords)
@@ -125,25 +344,18 @@ def create_concave_hull(points: npt.NDArray[np.float64], alpha: float = 0.5) ->
         print("Failed to create concave hull - possibly too few points")
         return None
 
-def save_clusters_to_parquet(clusters_info: Dict[str, Dict[int, npt.NDArray[np.float64]]], 
+def save_clusters_to_parquet(groups: List[str], cluster_numbers: List[int],
+                           coordinates: List[npt.NDArray[np.float64]],
                            output_path: str = './data/processed/clusters.zstd') -> None:
     """
     Save cluster information to a parquet file.
-    
+
     Args:
-        clusters_info: Dictionary containing cluster information
+        groups, cluster_numbers, coordinates: Parallel column buffers,
+            one entry per cluster, ordered by group
         output_path: Path to save the parquet file
     """
-    # Prepare flattened data
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    data = []
-    for group_name, clusters in clusters_info.items():
-        for cluster_num, coords in clusters.items():
-            data.append({
-                'group': group_name,
-                'cluster_number': cluster_num,
-                'coordinates': coords.tolist()
-            })
 
     # Define schema
     schema = pa.schema([
@@ -152,13 +364,31 @@ def save_clusters_to_parquet(clusters_info: Dict[str, Dict[int, npt.NDArray[np.f
         ('coordinates', pa.list_(pa.list_(pa.float64())))
     ])
 
-    table = pa.Table.from_pylist(data, schema=schema)
-    pq.write_table(
-        table,
+    # Stream one columnar batch per contiguous group run; peak memory
+    # stays at one group's hulls instead of a flattened record list
+    writer = pq.ParquetWriter(
         output_path,
+        schema,
         compression='zstd',
         compression_level=3
     )
+    try:
+        start = 0
+        for end in range(1, len(groups) + 1):
+            if end == len(groups) or groups[end] != groups[start]:
+                # Typed pa.array columns: hull rows stay ndarrays, so
+                # Arrow reads their buffers instead of boxing every
+                # float through tolist
+                batch = pa.RecordBatch.from_arrays([
+                    pa.array(groups[start:end], type=pa.string()),
+                    pa.array(cluster_numbers[start:end], type=pa.int64()),
+                    pa.array([list(coords) for coords in coordinates[start:end]],
+                             type=pa.list_(pa.list_(pa.float64())))
+                ], schema=schema)
+                writer.write_batch(batch)
+                start = end
+    finally:
+        writer.close()
 
 def create_geodataframe(points: npt.NDArray[np.float64], labels: npt.NDArray[np.int64]) -> gpd.GeoDataFrame:
     """
@@ -171,11 +401,13 @@ def create_geodataframe(points: npt.NDArray[np.float64], labels: npt.NDArray[np.
     Returns:
         GeoDataFrame with points and cluster information
     """
-    geometry = [Point(xy) for xy in points]
-    gdf = gpd.GeoDataFrame(geometry=geometry)
-    gdf['cluster'] = labels
-    gdf.crs = "EPSG:4326"  # WGS84
-    return gdf
+    # One vectorized Shapely 2.0 call instead of a Point() per row;
+    # points are (lat, lon), so x=lon and y=lat
+    return gpd.GeoDataFrame(
+        {'cluster': labels},
+        geometry=gpd.points_from_xy(points[:, 1], points[:, 0]),
+        crs="EPSG:4326"  # WGS84
+    )
 
 def plot_clusters_on_map(gdf: gpd.GeoDataFrame, category: str, 
                         plot_config: Dict[str, Any], output_dir: str, city: str) -> None:
@@ -196,13 +428,13 @@ def plot_clusters_on_map(gdf: gpd.GeoDataFrame, category: str,
     # Create figure and axis
     fig, ax = plt.subplots(figsize=(12, 12))
     
-    # Plot points with cluster colors
-    for cluster in gdf['cluster'].unique():
-        cluster_points = gdf[gdf['cluster'] == cluster]
-        color = plot_config['cluster_colors'][cluster % len(plot_config['cluster_colors'])]
-        cluster_points.plot(ax=ax, color=color, markersize=plot_config['point_size'],
-                          label=f'Cluster {cluster}')
-    
+    # Plot all points in one scatter call with a label-indexed RGBA
+    # palette, instead of building a matplotlib collection per cluster
+    palette = np.array([mcolors.to_rgba(c) for c in plot_config['cluster_colors']])
+    labels = gdf['cluster'].to_numpy()
+    ax.scatter(gdf.geometry.x.values, gdf.geometry.y.values,
+               c=palette[labels % len(palette)], s=plot_config['point_size'])
+
     try:
         # Try to add basemap using contextily
         import contextily as ctx
@@ -232,7 +464,11 @@ def plot_clusters_on_map(gdf: gpd.GeoDataFrame, category: str,
     # Customize plot
     ax.set_title(f'{city} - {category} Clusters', fontsize=14)
     if plot_config['show_legend']:
-        ax.legend()
+        # Proxy handles — a single scatter has no per-cluster artists
+        ax.legend(handles=[
+            Patch(color=palette[cluster % len(palette)], label=f'Cluster {cluster}')
+            for cluster in np.unique(labels)
+        ])
     
     # Save plot
     if plot_config['save_plots']:
@@ -265,23 +501,25 @@ def create_interactive_map(gdf: gpd.GeoDataFrame, category: str,
     center_lon = gdf.geometry.x.mean()
     m = folium.Map(location=[center_lat, center_lon], zoom_start=13)
     
-    # Add marker clusters
+    # Add marker clusters: one FastMarkerCluster per cluster hands the
+    # whole coordinate array to Leaflet in a single JS call, instead of
+    # rendering a CircleMarker template per point in Python
     for cluster in gdf['cluster'].unique():
         cluster_points = gdf[gdf['cluster'] == cluster]
         color = plot_config['cluster_colors'][cluster % len(plot_config['cluster_colors'])]
-        
-        # Create marker cluster for each cluster
-        marker_cluster = MarkerCluster(name=f'Cluster {cluster}').add_to(m)
-        
-        # Add points to marker cluster
-        for idx, row in cluster_points.iterrows():
-            folium.CircleMarker(
-                location=[row.geometry.y, row.geometry.x],
-                radius=plot_config['point_size'],
-                color=color,
-                fill=True,
-                popup=f'Cluster {cluster}'
-            ).add_to(marker_cluster)
+
+        locations = np.column_stack(
+            [cluster_points.geometry.y, cluster_points.geometry.x]
+        ).tolist()
+        callback = (
+            "function (row) {"
+            f" return L.circleMarker([row[0], row[1]], "
+            f"{{radius: {plot_config['point_size']}, color: '{color}', fill: true}})"
+            f".bindPopup('Cluster {cluster}');"
+            "}"
+        )
+        FastMarkerCluster(locations, callback=callback,
+                          name=f'Cluster {cluster}').add_to(m)
     
     # Add layer control
     folium.LayerControl().add_to(m)
@@ -291,6 +529,59 @@ def create_interactive_map(gdf: gpd.GeoDataFrame, category: str,
         output_path = os.path.join(city_output_dir, f'{category}_clusters.html')
         m.save(output_path)
 
+# Config params that are distances: given in km, converted to radians
+# for the haversine-metric estimators
+_KM_PARAMS = frozenset(('cluster_selection_epsilon', 'eps', 'max_eps'))
+
+def process_category(category: str, points: npt.NDArray[np.float32],
+                     technique: Dict[str, Any]) -> Tuple[npt.NDArray[np.int64], Dict[str, float],
+                                                         List[Tuple[int, Union[npt.NDArray[np.float64], None], int]]]:
+    """
+    Cluster one category's points and hull the resulting clusters.
+
+    Runs inside a joblib worker, so it only computes — printing and
+    plotting stay in the main process.
+
+    Args:
+        category: Category name (for error context only)
+        points: (lat, lon) points belonging to the category
+        technique: Clustering method and params from the YAML config
+
+    Returns:
+        Tuple of (labels, metrics, hulls) where hulls is a list of
+        (label, hull coordinates or None, number of points)
+    """
+    method = technique['method']
+    params = technique['params']
+    fit_points = points
+    if params.get('metric') == 'haversine':
+        # Haversine (BallTree-backed in HDBSCAN/OPTICS) expects radians,
+        # so distance-valued params come from the config in kilometers
+        # and are rescaled to radians alongside the points
+        fit_points = np.radians(points.astype(np.float64))
+        params = {key: value / 6371.0 if key in _KM_PARAMS else value
+                  for key, value in params.items()}
+    elif method == 'kmeans':
+        # Equirectangular weighting: shrink longitude by cos(mean lat)
+        # so euclidean k-means stops overweighting it away from the
+        # equator — no StandardScaler pass needed
+        fit_points = points.astype(np.float64).copy()
+        fit_points[:, 1] *= cos(radians(float(points[:, 0].mean())))
+    model = create_clustering_model(method, params)
+    labels = model.fit_predict(fit_points)
+    metrics = calculate_cluster_metrics(points, labels)
+
+    # Partition points by label with one stable sort instead of an
+    # O(N) mask per label
+    order = np.argsort(labels, kind='stable')
+    sorted_labels = labels[order]
+    label_starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_labels)) + 1))
+    label_groups = np.split(points[order], label_starts[1:])
+    unique_labels = sorted_labels[label_starts]
+    hulls = [(int(label), create_concave_hull(cluster_points), len(cluster_points))
+             for label, cluster_points in zip(unique_labels, label_groups)]
+    return labels, metrics, hulls
+
 def main():
     # Load configuration
     config = load_config()
@@ -299,83 +590,109 @@ def main():
     
     # Load and prepare data
     city = general_parameters.get('city')
-    df = pd.read_parquet(f'./data/collected/{city}_pois.zstd')
+    # Project to the three columns this script reads; the rest of the
+    # file is never decompressed
+    df = pd.read_parquet(f'./data/collected/{city}_pois.zstd',
+                         columns=['Latitude', 'Longitude', 'Custom'])
     print(f"Loaded {df.shape[0]} POIs for {city}")
     
-    # Extract coordinates and categories
-    X = np.array(df[['Latitude', 'Longitude']])
-    y = df['Custom'].apply(lambda x: x[0])
-    
-    # Get unique categories and their data points
-    categories = np.unique(y)
-    X_by_category = [X[y == cat] for cat in categories]
-    
+    # Extract coordinates and categories. float32 halves the bytes every
+    # later pass (bbox filter, clustering, distance matrices) moves;
+    # ~1 m worst-case precision is far below POI coordinate noise
+    lat = df['Latitude'].to_numpy(dtype=np.float32, copy=False)
+    lon = df['Longitude'].to_numpy(dtype=np.float32, copy=False)
+
     # Define area of interest
     search_long = general_parameters.get('longitude')
     search_lat = general_parameters.get('latitude')
     half_diagonal = general_parameters.get('half_diagonal_coor')
-    
+
     lat_min = search_lat - half_diagonal
     lat_max = search_lat + half_diagonal
     long_min = search_long - half_diagonal
     long_max = search_long + half_diagonal
-    
+
+    # Crop to the area of interest once with a geodesic radius query
+    # instead of a rectangular degree bbox, which distorts with
+    # latitude. One BallTree over all POIs, one query at the search
+    # center with the true center-to-corner distance as radius
+    radius_km = haversine_distance(long_min, lat_min, search_long, search_lat)
+    tree = BallTree(np.radians(np.column_stack((lat, lon)).astype(np.float64)),
+                    metric='haversine')
+    idx = np.sort(tree.query_radius(
+        np.radians([[search_lat, search_long]]), r=radius_km / 6371.0)[0])
+    X = np.column_stack((lat[idx], lon[idx]))
+    # Extract category labels only for in-area rows; the per-row lookup
+    # never touches POIs the crop already discarded. Custom holds real
+    # lists, so .str[0] element access replaces the Python lambda
+    y = df['Custom'].iloc[idx].str[0].to_numpy()
+
+    # Partition points into contiguous per-category slices with one stable
+    # sort; each category is then a view, not a fresh O(N) boolean scan
+    codes, categories = pd.factorize(y, sort=True)
+    order = np.argsort(codes, kind='stable')
+    X = X[order]
+    boundaries = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+
     # Calculate and print area metrics
     width_km, height_km, area_km2 = calculate_area_metrics(
         lat_min, lat_max, long_min, long_max, search_lat, search_long
     )
     print(f"Analysis area: {area_km2:.2f} km² ({width_km:.2f} km × {height_km:.2f} km)")
-    
-    # Process each category
-    clusters_info = {}
-    for category, X_cat in zip(categories, X_by_category):
+
+    # Collect per-category work, then run the categories concurrently —
+    # they are fully independent (disjoint POI subsets, separate models)
+    tasks = []
+    for cat_index, category in enumerate(categories):
         print(f"\nProcessing category: {category}")
         technique = config['clustering_techniques'].get(category)
         if technique is None:
             print(f"\nSkipping category {category} - no clustering technique defined")
             continue
-            
+
         print(f"\nProcessing category: {category} using {technique['method']}")
-        
-        # Filter points within area of interest
-        mask = ((X_cat[:,0] >= lat_min) & (X_cat[:,0] <= lat_max) & 
-                (X_cat[:,1] >= long_min) & (X_cat[:,1] <= long_max))
-        X_cat_subset = X_cat[mask]
-        
+
+        X_cat_subset = X[boundaries[cat_index]:boundaries[cat_index + 1]]
+
         if len(X_cat_subset) < 10:
             print(f"Skipping {category} - too few points ({len(X_cat_subset)})")
             continue
-        
-        # Apply clustering
-        model = create_clustering_model(technique['method'], technique['params'])
-        labels = model.fit_predict(X_cat_subset)
-        
-        # Calculate and print metrics
-        metrics = calculate_cluster_metrics(X_cat_subset, labels)
+
+        tasks.append((category, X_cat_subset, technique))
+
+    results = Parallel(n_jobs=-1, prefer='processes')(
+        delayed(process_category)(category, X_cat_subset, technique)
+        for category, X_cat_subset, technique in tasks
+    )
+
+    # Gather in the main process: metric printing, the SoA buffers for
+    # the parquet writer, and plotting (matplotlib/folium are not
+    # multiprocess-safe)
+    cluster_groups: List[str] = []
+    cluster_numbers: List[int] = []
+    cluster_coords: List[npt.NDArray[np.float64]] = []
+    for (category, X_cat_subset, technique), (labels, metrics, hulls) in zip(tasks, results):
+        print(f"\nCategory {category}:")
         if metrics:
             print("\nClustering metrics:")
             for metric, value in metrics.items():
                 print(f"{metric}: {value:.2f}")
-        
-        # Create concave hulls for each cluster
-        cluster_info = {}
-        for label in np.unique(labels):
-            cluster_points = X_cat_subset[labels == label]
-            hull = create_concave_hull(cluster_points)
+
+        for label, hull, num_points in hulls:
             if hull is not None:
-                cluster_info[label] = hull
-                print(f"Cluster {label}: Reduced to {len(hull)/len(cluster_points):.1%} of points")
-        
-        clusters_info[category] = cluster_info
-        
+                cluster_groups.append(category)
+                cluster_numbers.append(int(label))
+                cluster_coords.append(hull)
+                print(f"Cluster {label}: Reduced to {len(hull)/num_points:.1%} of points")
+
         # Plot clusters if enabled
         if plot_config.get('enabled', False):
             gdf = create_geodataframe(X_cat_subset, labels)
             plot_clusters_on_map(gdf, category, plot_config, plot_config['output_dir'], city)
             create_interactive_map(gdf, category, plot_config, plot_config['output_dir'], city)
-    
+
     # Save results
-    save_clusters_to_parquet(clusters_info)
+    save_clusters_to_parquet(cluster_groups, cluster_numbers, cluster_coords)
     print("\nClustering results saved to parquet file")
 
 if __name__ == "__main__":
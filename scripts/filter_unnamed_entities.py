@@ -0,0 +1,47 @@
+"""
+Utility to drop 'Unnamed' POIs from a collected CSV before indexing.
+
+Runs entirely on PyArrow: the CSV is parsed and filtered by Arrow's C
+kernels instead of a pandas round-trip, and a zstd parquet sibling is
+written next to the CSV output so the Elasticsearch indexer can skip
+CSV parsing altogether.
+"""
+
+from pathlib import Path
+import argparse
+import pyarrow.csv as pac
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+
+def filter_unnamed_entities(input_file, output_file):
+    """Filter rows whose Name is 'Unnamed' and write CSV + parquet outputs.
+
+    Args:
+        input_file: Path to the collected CSV
+        output_file: Path for the filtered CSV; a .parquet sibling is
+            written alongside it
+
+    Returns:
+        The filtered pyarrow Table
+    """
+    output_file = Path(output_file)
+    table = pac.read_csv(input_file)
+    table = table.filter(pc.not_equal(table['Name'], 'Unnamed'))
+    pac.write_csv(table, output_file)
+    pq.write_table(table, output_file.with_suffix('.parquet'), compression='zstd')
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop 'Unnamed' POIs from a collected CSV")
+    parser.add_argument('input_file', help='Path to the collected CSV')
+    parser.add_argument('output_file', help='Path for the filtered CSV')
+    args = parser.parse_args()
+
+    table = filter_unnamed_entities(args.input_file, args.output_file)
+    print(f"Kept {table.num_rows} named POIs")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@ import logging
 import yaml
 from tqdm import tqdm
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
 import pyarrow.parquet as pq
 import pyarrow.compute as pc
 
@@ -24,6 +24,24 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 logging.getLogger('elasticsearch').setLevel(logging.DEBUG)
 
+try:
+    import orjson
+    from elasticsearch.serializer import JsonSerializer
+
+    class OrjsonSerializer(JsonSerializer):
+        """Bulk payloads encoded by orjson: C-speed dumps that also
+        serialize numpy scalars natively."""
+
+        def dumps(self, data):
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+        def loads(self, data):
+            return orjson.loads(data)
+
+    _SERIALIZER_KWARGS = {'serializer': OrjsonSerializer()}
+except ImportError:
+    _SERIALIZER_KWARGS = {}
+
 def create_elasticsearch_index(es_client, index_name):
     """Create Elasticsearch index with optimized mappings for cluster shapes."""
     try:
@@ -67,17 +85,37 @@ def create_elasticsearch_index(es_client, index_name):
         logger.error(f"Error creating index: {e}")
         raise
 
+try:
+    from numba import njit
+
+    @njit(cache=True, fastmath=True)
+    def _shoelace(coords):
+        """Single-pass shoelace sum over a contiguous (n, 2) array."""
+        n = coords.shape[0]
+        s = 0.0
+        for i in range(n):
+            j = (i + 1) % n
+            s += coords[i, 0] * coords[j, 1] - coords[j, 0] * coords[i, 1]
+        return 0.5 * abs(s)
+
+    # Pay the JIT compilation cost once at import, outside the indexing loop
+    _shoelace(np.zeros((3, 2)))
+except ImportError:
+    def _shoelace(coords):
+        """Shoelace sum without the np.roll temporaries."""
+        x = coords[:, 0]
+        y = coords[:, 1]
+        s = np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])
+        s += x[-1] * y[0] - x[0] * y[-1]
+        return 0.5 * abs(s)
+
 def calculate_area_km2(coordinates):
     """Calculate approximate area of a polygon in square kilometers."""
     try:
-        # Convert coordinates to numpy array
-        coords = np.array(coordinates)
-        
-        # Calculate area using shoelace formula
-        x = coords[:, 0]
-        y = coords[:, 1]
-        area = 0.5 * np.abs(np.dot(x, np.roll(y, 1)) - np.dot(y, np.roll(x, 1)))
-        
+        # One typed contiguous array in, one pass over it
+        coords = np.ascontiguousarray(coordinates, dtype=np.float64)
+        area = _shoelace(coords)
+
         # Convert to square kilometers (approximate conversion)
         # This is a rough approximation as we're using lat/lon coordinates
         area_km2 = area * 111.32 * 111.32  # 1 degree ≈ 111.32 km
@@ -86,17 +124,21 @@ def calculate_area_km2(coordinates):
         logger.error(f"Error calculating area: {e}")
         return 0.0
 
-def prepare_cluster_document(group, cluster_num, coordinates, city):
+def prepare_cluster_document(group, cluster_num, coordinates, city, timestamp):
     """Prepare a cluster document for indexing."""
     try:
         # Format coordinates for geo_shape
-        # Elasticsearch expects coordinates in [lon, lat] format
-        formatted_coords = [[float(lon), float(lat)] for lat, lon in coordinates]
-        
+        # Elasticsearch expects coordinates in [lon, lat] format; one
+        # C-level column swap + tolist instead of per-vertex float() boxing
+        formatted_coords = np.asarray(coordinates, dtype=np.float64)[:, [1, 0]].tolist()
+        # Coordinates must be closed (first and last point same)
+        if formatted_coords[0] != formatted_coords[-1]:
+            formatted_coords.append(formatted_coords[0])
+
         # Create polygon shape
         shape = {
             "type": "polygon",
-            "coordinates": [formatted_coords]  # Note: coordinates must be closed (first and last point same)
+            "coordinates": [formatted_coords]
         }
         
         # Calculate area
@@ -107,7 +149,7 @@ def prepare_cluster_document(group, cluster_num, coordinates, city):
             "cluster_number": cluster_num,
             "shape": shape,
             "city": city,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "metadata": {
                 "num_points": len(coordinates),
                 "area_km2": area_km2
@@ -129,44 +171,48 @@ def index_clusters_to_elasticsearch(es_client, index_name, clusters_path, city):
         print(table.num_columns)
         print(table.to_pandas().head())
         
-        # Process in batches
-        batch_size = 100
-        total_docs = 0
-        failed_docs = 0
-        
-        # Get unique groups
-        groups = set(table.select(['group']).to_pydict()['group'])
-        
-        for group in tqdm(groups, desc=f"Indexing clusters for {city}"):
-            # Filter table for current group
-            print(group)
-            expr = pc.field("group") == group
-            group_table = table.filter(expr)
-            print(group_table.num_rows)
-            # Process each cluster in the group
-            for i in range(len(group_table)):
-                try:
-                    row = group_table.slice(i, 1)
-                    cluster_num = row['cluster_number'][0].as_py()
-                    coordinates = row['coordinates'][0].as_py()
-                    
-                    # Prepare document
-                    doc = prepare_cluster_document(group, cluster_num, coordinates, city)
+        # Sort by group once so each group is one contiguous slice, then
+        # pull every group columnar in a single to_pydict instead of a
+        # per-row table.slice + as_py
+        table = table.sort_by('group')
+        group_counts = pc.value_counts(table['group']).to_pylist()
+
+        # One timestamp for the whole load instead of a datetime.now()
+        # call per document
+        timestamp = datetime.now(timezone.utc).isoformat()
+
+        def actions():
+            offset = 0
+            for entry in tqdm(group_counts, desc=f"Indexing clusters for {city}"):
+                group, count = entry['values'], entry['counts']
+                print(group)
+                print(count)
+                group_data = table.slice(offset, count).to_pydict()
+                offset += count
+                # Process each cluster in the group
+                for cluster_num, coordinates in zip(group_data['cluster_number'],
+                                                    group_data['coordinates']):
+                    doc = prepare_cluster_document(group, cluster_num, coordinates, city,
+                                                   timestamp)
                     if doc:
-                        # Index document
-                        es_client.index(
-                            index=index_name,
-                            body=doc,
-                            refresh=True
-                        )
-                        total_docs += 1
-                except Exception as e:
-                    logger.error(f"Error processing cluster: {e}")
-                    failed_docs += 1
-                    continue
-        
+                        yield {"_index": index_name, "_source": doc}
+
+        # Pause refreshes for the duration of the load; one explicit
+        # refresh at the end makes everything searchable at once
+        es_client.indices.put_settings(
+            index=index_name, body={"index": {"refresh_interval": "-1"}})
+        try:
+            total_docs, errors = bulk(
+                es_client, actions(), chunk_size=500,
+                request_timeout=120, raise_on_error=False
+            )
+            failed_docs = len(errors)
+        finally:
+            es_client.indices.put_settings(
+                index=index_name, body={"index": {"refresh_interval": "1s"}})
+
         logger.info(f"Indexed {total_docs} cluster shapes, {failed_docs} failed")
-        
+
         # Force a refresh to ensure all documents are searchable
         es_client.indices.refresh(index=index_name)
         
@@ -211,6 +257,7 @@ def main():
             },
             # Add basic auth if needed
             # basic_auth=('username', 'password')
+            **_SERIALIZER_KWARGS
         )
         
         # Check connection with more detailed error handling
@@ -1,6 +1,6 @@
 import pandas as pd
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import parallel_bulk
 import json
 from pathlib import Path
 import os
@@ -9,13 +9,37 @@ import logging
 import yaml
 from tqdm import tqdm
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timezone
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Columns the indexer actually reads from the collected parquet files
+INDEX_COLUMNS = ["Name", "Latitude", "Longitude", "Categories", "Custom"]
+INDEX_NAME = 'urban_areas'
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 logging.getLogger('elasticsearch').setLevel(logging.DEBUG)
 
+try:
+    import orjson
+    from elasticsearch.serializer import JsonSerializer
+
+    class OrjsonSerializer(JsonSerializer):
+        """Bulk payloads encoded by orjson: C-speed dumps that also
+        serialize numpy scalars natively."""
+
+        def dumps(self, data):
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+        def loads(self, data):
+            return orjson.loads(data)
+
+    _SERIALIZER_KWARGS = {'serializer': OrjsonSerializer()}
+except ImportError:
+    _SERIALIZER_KWARGS = {}
+
 def create_elasticsearch_index(es_client, index_name):
     """Create Elasticsearch index with optimized mappings."""
     try:
@@ -29,24 +53,19 @@ def create_elasticsearch_index(es_client, index_name):
             "settings": {
                 "number_of_shards": 1,
                 "number_of_replicas": 0,
-                "refresh_interval": "1s"  # Set to 1 second for development
+                # Bulk-load posture: no background refreshes and a lazy
+                # translog; restored to a searchable interval after the load
+                "refresh_interval": "-1",
+                "translog.flush_threshold_size": "1gb",
+                "translog.durability": "async"
             },
             "mappings": {
                 "properties": {
                     "name": {"type": "text"},
                     "city": {"type": "keyword"},
-                    "latitude": {"type": "double"},
-                    "longitude": {"type": "double"},
                     "location": {"type": "geo_point"},
                     "categories": {"type": "keyword"},
-                    "timestamp": {"type": "date"},
-                    "metadata": {
-                        "type": "object",
-                        "properties": {
-                            "source": {"type": "keyword"},
-                            "confidence": {"type": "float"}
-                        }
-                    }
+                    "timestamp": {"type": "date"}
                 }
             }
         }
@@ -59,120 +78,143 @@ def create_elasticsearch_index(es_client, index_name):
         logger.error(f"Error creating index: {e}")
         raise
 
-def prepare_document(row):
-    """Prepare a document for indexing."""
-    try:
-        # Get latitude and longitude
-        lat = float(row["Latitude"]) if pd.notna(row.get("Latitude")) else 0.0
-        lon = float(row["Longitude"]) if pd.notna(row.get("Longitude")) else 0.0
-        
-        # Normalize field names and structure
-        doc = {
-            "name": str(row["Name"]) if pd.notna(row.get("Name")) else "",
-            "city": str(row["city"]) if pd.notna(row.get("city")) else "",
-            "latitude": lat,
-            "longitude": lon,
-            "location": {"lat": lat, "lon": lon},  # Added geo_point field
-            "categories": str(row["Categories"]) if pd.notna(row.get("Categories")) else "",
-            "timestamp": datetime.now().isoformat(),
-            "metadata": {
-                "source": "scraped_data",
-                "confidence": 1.0
-            }
-        }
-        
-        # Add custom fields if they exist
-        if pd.notna(row.get("Custom")):
-            if isinstance(row["Custom"], (list, np.ndarray)):
-                doc["custom_tags"] = [str(tag) for tag in row["Custom"]]
-            else:
-                doc["custom_tags"] = [str(row["Custom"])]
-        
-        return doc
-    except Exception as e:
-        logger.error(f"Error preparing document: {e}, row: {row}")
-        return None
+# Plain pass-through fields of the document; location and custom_tags
+# have their own shapes and are emitted by the generated builder below
+_DOC_FIELDS = ("name", "city", "categories", "timestamp")
+
+def _compile_prepare_document():
+    """Generate prepare_document once at import.
+
+    The document layout is fixed at program start, so the builder is
+    compiled to straight-line code with the field set baked in instead
+    of walking a schema per call. The caller pulls each column out of
+    the frame once (NaNs already filled, strings already cast), so no
+    per-field pd.notna dispatch happens here. location stays the single
+    copy of the coordinates; Custom holds a list/array of tags when
+    present."""
+    entries = ", ".join(f"'{field}': {field}" for field in _DOC_FIELDS)
+    src = (
+        "def prepare_document(name, city, lat, lon, categories, custom, timestamp):\n"
+        f"    doc = {{{entries}, 'location': {{'lat': lat, 'lon': lon}}}}\n"
+        "    if isinstance(custom, (list, tuple, np.ndarray)):\n"
+        "        if len(custom) > 0:\n"
+        "            doc['custom_tags'] = [str(tag) for tag in custom]\n"
+        "    elif custom is not None and pd.notna(custom):\n"
+        "        doc['custom_tags'] = [str(custom)]\n"
+        "    return doc\n"
+    )
+    namespace = {'np': np, 'pd': pd}
+    exec(compile(src, '<prepare_document>', 'exec'), namespace)
+    return namespace['prepare_document']
+
+prepare_document = _compile_prepare_document()
 
 def index_data_to_elasticsearch(es_client, index_name, df):
     """Index data to Elasticsearch using bulk operations."""
     try:
+        # Pull and clean each column once as an array; the generator then
+        # zips plain scalars instead of building a dict or Series per row
+        names = df['Name'].fillna('').astype(str).to_numpy()
+        cities = df['city'].fillna('').astype(str).to_numpy()
+        lats = pd.to_numeric(df['Latitude'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+        lons = pd.to_numeric(df['Longitude'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+        categories = df['Categories'].fillna('').astype(str).to_numpy() \
+            if 'Categories' in df.columns else np.full(len(df), '', dtype=object)
+        customs = df['Custom'].to_numpy() \
+            if 'Custom' in df.columns else np.full(len(df), None, dtype=object)
+        timestamp = datetime.now(timezone.utc).isoformat()
+
+        def actions():
+            for name, city, lat, lon, cats, custom in zip(
+                    names, cities, lats, lons, categories, customs):
+                doc = prepare_document(name, city, float(lat), float(lon),
+                                       cats, custom, timestamp)
+                if doc:  # Only yield valid documents
+                    yield {"_index": index_name, "_source": doc}
+
+        # Several bulk requests in flight at once instead of one
+        # round-trip at a time; chunk/byte caps keep requests ES-friendly
         total_docs = 0
         failed_docs = 0
-        
-        # Process in batches of 500
-        batch_size = 500
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i + batch_size]
-            actions = []
-            
-            for _, row in batch.iterrows():
-                try:
-                    doc = prepare_document(row)
-                    if doc:  # Only add valid documents
-                        actions.append({"index": {"_index": index_name}})
-                        actions.append(doc)
-                except Exception as e:
-                    logger.error(f"Error preparing document: {e}")
-                    failed_docs += 1
-                    continue
-            
-            if actions:  # Only perform bulk operation if there are valid actions
-                try:
-                    response = es_client.bulk(operations=actions, refresh=True)
-                    if response["errors"]:
-                        failed_items = [item for item in response["items"] if "error" in item["index"]]
-                        for item in failed_items:
-                            logger.error(f"Failed to index document: {item['index']['error']}")
-                            failed_docs += 1
-                    total_docs += len(actions) // 2  # Divide by 2 because each doc has 2 actions
-                except Exception as e:
-                    logger.error(f"Bulk indexing error: {e}")
-                    failed_docs += len(actions) // 2
-        
+        for ok, item in parallel_bulk(es_client, actions(), thread_count=8,
+                                      chunk_size=1000,
+                                      max_chunk_bytes=10 * 1024 * 1024,
+                                      queue_size=4, raise_on_error=False):
+            if ok:
+                total_docs += 1
+            else:
+                failed_docs += 1
+                logger.error(f"Failed to index document: {item}")
+
         logger.info(f"Indexed {total_docs} documents, {failed_docs} failed")
-        
-        # Force a refresh to ensure all documents are searchable
-        es_client.indices.refresh(index=index_name)
-        
-        # Verify document count
-        count = es_client.count(index=index_name)
-        logger.info(f"Total documents in index: {count['count']}")
-        
-        if total_docs - failed_docs != count['count']:
-            logger.warning(f"Document count mismatch. Expected {total_docs - failed_docs}, got {count['count']}")
-        
+
     except Exception as e:
         logger.error(f"Error in bulk indexing: {e}")
         raise
 
-def main(df,delete_index=False):
-    # Get the project root directory and load environment variables
-    project_root = Path(__file__).parent.parent
-    env_path = project_root / '.env'
-    load_dotenv()        
-    
-    # Elasticsearch configuration
-    es_host = os.getenv('ELASTICSEARCH_URL','http://localhost:9200')
-    logger.info(f"Using Elasticsearch host: {es_host}")
-    if not es_host:
-        raise ValueError(f"ELASTICSEARCH_URL environment variable is not set in {env_path}")
-    
+def finalize_index(es_client, index_name):
+    """End the bulk-load posture once the whole load is done.
+
+    Back to a periodic refresh, then one explicit refresh so all
+    documents become searchable at once; runs after every batch and
+    city has been indexed, not per batch."""
+    es_client.indices.put_settings(
+        index=index_name, body={"index": {"refresh_interval": "30s"}})
+    es_client.indices.refresh(index=index_name)
+    count = es_client.count(index=index_name)
+    logger.info(f"Total documents in index: {count['count']}")
+
+def index_parquet_to_elasticsearch(es_client, index_name, parquet_path, city):
+    """Stream a city parquet into Elasticsearch one row-group batch at a time.
+
+    Peak memory stays at one batch instead of the whole city file."""
+    parquet_file = pq.ParquetFile(parquet_path)
+    columns = [column for column in INDEX_COLUMNS
+               if column in parquet_file.schema_arrow.names]
+    for record_batch in parquet_file.iter_batches(batch_size=5000, columns=columns):
+        batch_df = record_batch.to_pandas()
+        batch_df['city'] = city
+        index_data_to_elasticsearch(es_client, index_name, batch_df)
+
+def create_es_client():
+    """Build an Elasticsearch client from the environment."""
+    load_dotenv()
+    es_host = os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')
     logger.info(f"Using Elasticsearch host: {es_host}")
-    index_name = 'urban_areas'
-    
+    return Elasticsearch(
+        es_host,
+        request_timeout=30,
+        verify_certs=False,
+        ssl_show_warn=False,
+        headers={
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        },
+        **_SERIALIZER_KWARGS
+    )
+
+# One client per worker process, built lazily in the pool initializer
+_worker_es_client = None
+
+def _init_worker():
+    global _worker_es_client
+    _worker_es_client = create_es_client()
+
+def _index_city(city):
+    index_parquet_to_elasticsearch(_worker_es_client, INDEX_NAME,
+                                   f'./data/collected/{city}_pois.zstd', city)
+
+def main(df,delete_index=False,city=None):
+    """One-shot entry point: build a client, optionally recreate the
+    index, and index a single DataFrame or parquet path.
+
+    The batch entry point below does not go through here — it creates
+    the client and index once for all cities."""
+    index_name = INDEX_NAME
+
     try:
-        # Initialize Elasticsearch client with proper headers
-        es_client = Elasticsearch(
-            es_host,
-            request_timeout=30,
-            verify_certs=False,
-            ssl_show_warn=False,
-            headers={
-                'Accept': 'application/json',
-                'Content-Type': 'application/json'
-            }
-        )
-        
+        es_client = create_es_client()
+
         # Check connection
         try:
             info = es_client.info()
@@ -185,9 +227,14 @@ def main(df,delete_index=False):
         if delete_index:
             create_elasticsearch_index(es_client, index_name)
         
-        # Index the data
-        index_data_to_elasticsearch(es_client, index_name, df)
-        
+        # Index the data: a path streams batch-by-batch, a DataFrame
+        # keeps the old direct behavior
+        if isinstance(df, pd.DataFrame):
+            index_data_to_elasticsearch(es_client, index_name, df)
+        else:
+            index_parquet_to_elasticsearch(es_client, index_name, df, city)
+        finalize_index(es_client, index_name)
+
     except Exception as e:
         logger.error(f"Error in main process: {e}")
         raise
@@ -197,12 +244,22 @@ if __name__ == "__main__":
     config_path = project_root / 'configs' / 'scraping_config.yaml'
     with open(config_path, 'r') as file:
         config = yaml.safe_load(file)
-    delete_index=True
-    bar = tqdm(config['cities'],desc='Indexing cities')
-    for city in bar:
-        df=pd.read_parquet(f'./data/collected/{city}_pois.zstd')
-        df['city']=city
-        print(df.head())
-        main(df,delete_index)
-        bar.set_postfix(city=city)
-        delete_index=False
\ No newline at end of file
+    cities = config['cities']
+
+    # Recreate the index once in the parent so workers never race to
+    # delete it, then index cities in parallel worker processes
+    es_client = create_es_client()
+    create_elasticsearch_index(es_client, INDEX_NAME)
+
+    try:
+        with ProcessPoolExecutor(max_workers=4, initializer=_init_worker) as executor:
+            futures = {executor.submit(_index_city, city): city for city in cities}
+            bar = tqdm(as_completed(futures), total=len(cities), desc='Indexing cities')
+            for future in bar:
+                future.result()
+                bar.set_postfix(city=futures[future])
+    finally:
+        # Leave the bulk-load posture even if a city failed, so the
+        # index never stays unsearchable
+        finalize_index(es_client, INDEX_NAME)
+        es_client.close()
\ No newline at end of file